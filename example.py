@@ -10,14 +10,11 @@ def main(pm: PortMan) -> TuiConf:
     # speaker = pm.stereo_speaker_ref("Blue Microphones Pro")
     # speaker = pm.stereo_speaker_ref("Scarlett 4i4 USB Pro")
     speaker = None
-    for client_name in sorted(pm.clients):
-        try:
-            speaker = pm.stereo_speaker_ref(client_name)
+    for client_name in pm.sorted_client_names():
+        speaker = pm.try_stereo_speaker_ref(client_name)
+        if speaker is not None:
             print(client_name)
             print(speaker)
-        except Exception:
-            pass
-        else:
             # Tell pulseaudio to make this the default sink:
             # pm.set_default_sink(client_name)
             break
@@ -33,11 +30,10 @@ def main(pm: PortMan) -> TuiConf:
         # and wire them to the given keyboard keys.
         keys = "ZXCVB"
         sources = []
-        for client_name in sorted(pm.clients):
-            try:
-                sources.append(pm.stereo_out_ref(client_name))
-            except Exception:
-                pass
+        for client_name in pm.sorted_client_names():
+            source = pm.try_stereo_out_ref(client_name)
+            if source is not None:
+                sources.append(source)
             if len(sources) == len(keys):
                 break
         return {
@@ -1,87 +1,91 @@
 #!/usr/bin/env python3
-import subprocess
+import select
+import threading
+import time
 from typing import (
-    Dict, Tuple
+    Dict, Optional, Tuple
 )
 
 import alsaaudio
-from portman.base import SimpleEqMixin, KeyedEqMixin
+from portman.base import KeyedEqMixin
 
 
-class AmixerTrackBase(SimpleEqMixin):
-    def __init__(self, card_index: int, control_name: str) -> None:
-        self.card_index = card_index
-        self.control_name = control_name
-
-    def _get_lines(self) -> Dict[str, str]:
-        lines = subprocess.check_output(
-            ("amixer", "-c1", "sget", "%s,0" % self.control_name),
-            universal_newlines=True,
-        ).splitlines()
-        assert lines[0].startswith("Simple mixer control")
-        return {k: v for line in lines[1:] for k, v in [line.strip().split(": ", 1)]}
-
-    def _set(self, s: str) -> None:
-        subprocess.check_call(
-            ("amixer", "-c1", "sset", "%s,0" % self.control_name, s),
-            stdout=subprocess.DEVNULL,
-        )
-
-
-class AmixerEnumTrack(AmixerTrackBase):
-    def __init__(
-        self, card_index: int, control_name: str, off_setting: str, on_setting: str
-    ) -> None:
-        super().__init__(card_index, control_name)
-        self.off_setting = off_setting
-        self.on_setting = on_setting
-
-    def get(self) -> bool:
-        return self._get_lines()["Item0"] == "'%s'" % self.on_setting
-
-    def set(self, v: bool) -> None:
-        self._set(self.on_setting if v else self.off_setting)
+_mixers: Dict[Tuple[int, str], alsaaudio.Mixer] = {}
+# Enum label -> index per control; the label list is static for a given
+# control, so one getenum() at first use serves every later set().
+_enum_labels: Dict[Tuple[int, str], Dict[str, int]] = {}
+_poll_thread: Optional[threading.Thread] = None
 
-    def __repr__(self) -> str:
-        return f"<AmixerEnumTrack control_name={self.control_name} off={self.off_setting} on={self.on_setting}>"
 
-    def print(self, c: str) -> None:
-        print(c, self.control_name, self.on_setting, self.off_setting, end="\r\n")
+def _get_mixer(card_index: int, control_name: str) -> alsaaudio.Mixer:
+    try:
+        return _mixers[card_index, control_name]
+    except KeyError:
+        _mixers[card_index, control_name] = m = alsaaudio.Mixer(
+            cardindex=card_index, control=control_name
+        )
+        _start_mixer_poller()
+        return m
 
 
-class AmixerVolumeTrack(AmixerTrackBase):
-    def __init__(self, card_index: int, control_name: str, on_setting: int) -> None:
-        super().__init__(card_index, control_name)
-        self.off_setting = 0
-        self.on_setting = on_setting
+def _get_enum_labels(card_index: int, control_name: str) -> Dict[str, int]:
+    try:
+        return _enum_labels[card_index, control_name]
+    except KeyError:
+        _, labels = _get_mixer(card_index, control_name).getenum()
+        _enum_labels[card_index, control_name] = d = {
+            label: i for i, label in enumerate(labels)
+        }
+        return d
 
-    def get(self) -> bool:
-        return int(self._get_lines()["Mono"].split()[1]) == self.on_setting
 
-    def set(self, v: bool) -> None:
-        self._set(str(self.on_setting if v else self.off_setting))
+def _mixer_poll_loop() -> None:
+    while True:
+        fds = {}
+        for m in list(_mixers.values()):
+            for fd, _mask in m.polldescriptors():
+                fds[fd] = m
+        # Time out now and then so newly opened mixers get picked up.
+        r, _w, _x = select.select(list(fds), [], [], 1)
+        if not r:
+            continue
+        for fd in r:
+            try:
+                fds[fd].handleevents()
+            except alsaaudio.ALSAAudioError:
+                pass
+        invalidate_cache()
 
-    def __repr__(self) -> str:
-        return f"<AmixerVolumeTrack control_name={self.control_name} off={self.off_setting} on={self.on_setting}>"
 
-    def print(self, c: str) -> None:
-        print(c, self.control_name, self.on_setting, self.off_setting, end="\r\n")
+def _start_mixer_poller() -> None:
+    global _poll_thread
+    if _poll_thread is None:
+        _poll_thread = threading.Thread(target=_mixer_poll_loop, daemon=True)
+        _poll_thread.start()
 
 
-_mixers: Dict[Tuple[int, str], alsaaudio.Mixer] = {}
+_cache_generation = 0
+# How long a cached get() stays valid without an invalidation event;
+# bounds how stale we can look if something outside portman moves a control.
+_CACHE_TTL = 0.05
 
 
-def _get_mixer(card_index: int, control_name: str) -> alsaaudio.Mixer:
-    try:
-        return _mixers[card_index, control_name]
-    except KeyError:
-        _mixers[card_index, control_name] = m = alsaaudio.Mixer(
-            cardindex=card_index, control=control_name
-        )
-        return m
+def invalidate_cache() -> None:
+    global _cache_generation
+    _cache_generation += 1
 
 
 class PyalsaaudioEnumTrack(KeyedEqMixin):
+    __slots__ = (
+        "card_index",
+        "control_name",
+        "mixer",
+        "off_setting",
+        "on_setting",
+        "_label_index",
+        "_cached",
+    )
+
     def __init__(
         self, card_index: int, control_name: str, off_setting: str, on_setting: str
     ) -> None:
@@ -91,18 +95,28 @@ class PyalsaaudioEnumTrack(KeyedEqMixin):
         self.mixer = _get_mixer(card_index, control_name)
         self.off_setting = off_setting
         self.on_setting = on_setting
+        self._label_index = _get_enum_labels(card_index, control_name)
+        self._cached = (-1, 0.0, False)
 
     def get(self) -> bool:
-        return self.mixer.getenum()[0] == self.on_setting
+        gen, ts, value = self._cached
+        now = time.monotonic()
+        if gen == _cache_generation and now - ts < _CACHE_TTL:
+            return value
+        value = self.mixer.getenum()[0] == self.on_setting
+        self._cached = (_cache_generation, now, value)
+        return value
 
     def set(self, v: bool) -> None:
-        c, vs = self.mixer.getenum()
-        try:
-            i = vs.index(self.on_setting if v else self.off_setting)
-            self.mixer.setenum(i)
-        except alsaaudio.ALSAAudioError:
-            print(self.key, v, i, c, vs)
-            raise
+        setting = self.on_setting if v else self.off_setting
+        if self.mixer.getenum()[0] != setting:
+            try:
+                self.mixer.setenum(self._label_index[setting])
+            except (KeyError, alsaaudio.ALSAAudioError):
+                print(self.key, v, setting, self._label_index)
+                raise
+            invalidate_cache()
+        self._cached = (_cache_generation, time.monotonic(), v)
 
     def __repr__(self) -> str:
         args = ", ".join(
@@ -116,6 +130,15 @@ class PyalsaaudioEnumTrack(KeyedEqMixin):
 
 
 class PyalsaaudioVolumeTrack(KeyedEqMixin):
+    __slots__ = (
+        "card_index",
+        "control_name",
+        "mixer",
+        "off_setting",
+        "on_setting",
+        "_cached",
+    )
+
     def __init__(self, card_index: int, control_name: str, on_setting: int) -> None:
         self.key = (card_index, control_name, on_setting)
         self.card_index = card_index
@@ -123,13 +146,23 @@ class PyalsaaudioVolumeTrack(KeyedEqMixin):
         self.mixer = _get_mixer(card_index, control_name)
         self.off_setting = 0
         self.on_setting = on_setting
+        self._cached = (-1, 0.0, False)
 
     def get(self) -> bool:
-        v = self.mixer.getvolume()[0]
-        return v == self.on_setting
+        gen, ts, value = self._cached
+        now = time.monotonic()
+        if gen == _cache_generation and now - ts < _CACHE_TTL:
+            return value
+        value = self.mixer.getvolume()[0] == self.on_setting
+        self._cached = (_cache_generation, now, value)
+        return value
 
     def set(self, v: bool) -> None:
-        self.mixer.setvolume(self.on_setting if v else self.off_setting)
+        target = self.on_setting if v else self.off_setting
+        if self.mixer.getvolume()[0] != target:
+            self.mixer.setvolume(target)
+            invalidate_cache()
+        self._cached = (_cache_generation, time.monotonic(), v)
 
     def __repr__(self) -> str:
         args = ", ".join(
@@ -140,3 +173,13 @@ class PyalsaaudioVolumeTrack(KeyedEqMixin):
 
     def print(self, c: str) -> None:
         print(c, self.control_name, self.on_setting, self.off_setting, end="\r\n")
+
+
+# Backwards-compatible names from when these tracks shelled out to amixer;
+# they are plain pyalsaaudio tracks now.
+class AmixerEnumTrack(PyalsaaudioEnumTrack):
+    __slots__ = ()
+
+
+class AmixerVolumeTrack(PyalsaaudioVolumeTrack):
+    __slots__ = ()
@@ -1,25 +1,28 @@
 #!/usr/bin/env python3
+import concurrent.futures
 import contextlib
+import json
 import os
 import string
 import subprocess
 import sys
 import termios
 import threading
-import traceback
+import time
 import tty
 from typing import (
     Any,
     Callable,
     Dict,
+    FrozenSet,
     Iterator,
     List,
     NamedTuple,
     Optional,
     Protocol,
     Sequence,
+    Set,
     Tuple,
-    TypedDict,
 )
 
 
@@ -29,12 +32,23 @@ class PortRef(NamedTuple):
     port_name: str
 
 
-class Port(TypedDict):
-    connections: Dict[PortRef, None]
+class Port:
+    __slots__ = ("connections",)
+
+    def __init__(self) -> None:
+        self.connections: Set[PortRef] = set()
+
+
+class Client:
+    __slots__ = ("ports",)
+
+    def __init__(self) -> None:
+        self.ports: Dict[PortRef, Port] = {}
 
 
-class Client(TypedDict):
-    ports: Dict[PortRef, Port]
+# Diagnostic prints in the key-handler hot paths; formatting the track
+# reprs and flushing the terminal stalls the TUI, so keep them opt-in.
+_TRACE = bool(os.environ.get("PORTMAN_TRACE"))
 
 
 class ConnectionTrackProtocol(Protocol):
@@ -49,11 +63,22 @@ class ConnectionTrackProtocol(Protocol):
 
 
 class SimpleEqMixin:
+    __slots__ = ()
+
     def __eq__(self, o: Any) -> bool:
-        return o.__class__ is self.__class__ and self.__dict__ == o.__dict__
+        if o.__class__ is not self.__class__:
+            return False
+        for cls in self.__class__.__mro__:
+            for s in getattr(cls, "__slots__", ()):
+                # Leading-underscore slots are caches, not identity.
+                if not s.startswith("_") and getattr(self, s) != getattr(o, s):
+                    return False
+        return True
 
 
 class KeyedEqMixin:
+    __slots__ = ("key",)
+
     key: Any
 
     def __eq__(self, o: Any) -> bool:
@@ -61,6 +86,8 @@ class KeyedEqMixin:
 
 
 class Swap(KeyedEqMixin):
+    __slots__ = ("a", "b")
+
     def __init__(self, *tracks: ConnectionTrackProtocol) -> None:
         self.key = tuple(tracks)
         assert len(tracks) % 2 == 0
@@ -75,17 +102,22 @@ class Swap(KeyedEqMixin):
     def set(self, _v: bool) -> None:
         a_s = [t.get() for t in self.a]
         b_s = [t.get() for t in self.b]
-        print("\r\x1b[K%s %s %s %s" % (self.a, a_s, self.b, b_s))
-        for a, t in zip(a_s, self.b):
-            t.set(a)
-        for b, t in zip(b_s, self.a):
-            t.set(b)
+        if _TRACE:
+            print("\r\x1b[K%s %s %s %s" % (self.a, a_s, self.b, b_s))
+        for a, t, cur in zip(a_s, self.b, b_s):
+            if cur != a:
+                t.set(a)
+        for b, t, cur in zip(b_s, self.a, a_s):
+            if cur != b:
+                t.set(b)
 
     def print(self, c: str) -> None:
         print(c, "Swap", end="\r\n")
 
 
 class Push(KeyedEqMixin):
+    __slots__ = ("froms", "tos")
+
     def __init__(self, *tracks: ConnectionTrackProtocol) -> None:
         self.key = tuple(tracks)
         assert len(tracks) % 2 == 0
@@ -98,36 +130,51 @@ class Push(KeyedEqMixin):
         return a_s != b_s
 
     def set(self, _v: bool) -> None:
-        vals = [u.get() for u in self.froms], [u.get() for u in self.tos]
-        print("\r\x1b[K%s %s" % vals)
-        for u, v in zip(vals[0], self.tos):
-            v.set(u)
+        vals = [u.get() for u in self.froms]
+        old = [u.get() for u in self.tos]
+        if _TRACE:
+            print("\r\x1b[K%s %s" % (vals, old))
+        for u, v, cur in zip(vals, self.tos, old):
+            if cur != u:
+                v.set(u)
             # print("\r\x1b[K%r %s %s" % (v, u, v.get()))
-        vals = [u.get() for u in self.froms], [u.get() for u in self.tos]
-        print("\r\x1b[K%s %s" % vals)
+        if _TRACE:
+            print("\r\x1b[K%s %s" % (vals, vals))
 
     def print(self, c: str) -> None:
         print(c, "Push", end="\r\n")
 
 
-class ConnectionTrack(SimpleEqMixin):
+class ConnectionTrack(KeyedEqMixin):
+    __slots__ = ("pm", "a", "b", "_a_name", "_b_name", "_cached_gen", "_cached")
+
     def __init__(self, pm: "PortMan", a: PortRef, b: PortRef) -> None:
+        self.key = (a, b)
         self.pm = pm
         self.a = a
         self.b = b
+        self._a_name = f"{a.subclient_name}:{a.port_name}"
+        self._b_name = f"{b.subclient_name}:{b.port_name}"
+        self._cached_gen = -1
+        self._cached = False
 
     def get(self) -> bool:
-        a_client = self.pm.clients[self.a.client_name]
-        a_port = a_client["ports"][self.a]
-        return self.b in a_port["connections"]
+        gen = self.pm._cache_gen
+        if self._cached_gen == gen:
+            return self._cached
+        with self.pm._graph_lock:
+            value = (self.a, self.b) in self.pm._conns_by_pair
+        self._cached_gen = gen
+        self._cached = value
+        return value
 
     def set(self, v: bool) -> None:
-        a_name = f"{self.a.subclient_name}:{self.a.port_name}"
-        b_name = f"{self.b.subclient_name}:{self.b.port_name}"
-        if v and not self.get():
-            self.pm._conn.connect(a_name, b_name)
-        elif not v and self.get():
-            self.pm._conn.disconnect(a_name, b_name)
+        if v == self.get():
+            return
+        (self.pm._conn.connect if v else self.pm._conn.disconnect)(
+            self._a_name, self._b_name
+        )
+        self.pm._cache_gen += 1
 
     def print(self, c: str) -> None:
         print(
@@ -141,6 +188,8 @@ class ConnectionTrack(SimpleEqMixin):
 
 
 class MultiConnectionTrack(SimpleEqMixin):
+    __slots__ = ("tracks",)
+
     def __init__(self, *tracks: ConnectionTrackProtocol) -> None:
         self.tracks = tracks
 
@@ -148,11 +197,27 @@ class MultiConnectionTrack(SimpleEqMixin):
         return "%s(%s)" % (self.__class__.__name__, ", ".join(map(repr, self.tracks)))
 
     def get(self) -> bool:
-        return self.tracks[0].get()
+        # The subordinate gets are generation-cached, so the AND over
+        # them is cheap and always reflects current state.
+        return all(t.get() for t in self.tracks)
 
     def set(self, v: bool) -> None:
-        for t in self.tracks:
-            t.set(v)
+        with contextlib.ExitStack() as stack:
+            # Hold back graph-reorder handling while the whole group is
+            # applied, so N connects cost one reorder pass, not N.
+            for pm in {t.pm for t in self.tracks if isinstance(t, ConnectionTrack)}:
+                stack.enter_context(pm.batching())
+            if len(self.tracks) < 2:
+                for t in self.tracks:
+                    t.set(v)
+            else:
+                # The underlying connect/disconnect calls are I/O-bound round
+                # trips, so issue them in parallel. Each nested group gets its
+                # own small pool, which keeps a deep preset from starving
+                # itself.
+                with concurrent.futures.ThreadPoolExecutor(max_workers=4) as ex:
+                    for fut in [ex.submit(t.set, v) for t in self.tracks]:
+                        fut.result()
 
     def print(self, c: str) -> None:
         for t in self.tracks:
@@ -162,6 +227,86 @@ class MultiConnectionTrack(SimpleEqMixin):
                 print(c, t, repr(e))
 
 
+# Known port-name sets mapped to the (left, right) stereo pair to return.
+_STEREO_OUT_TABLE: Dict[FrozenSet[str], Tuple[str, str]] = {
+    # Built-in Audio Analog Stereo
+    frozenset(
+        {
+            "capture_FL",
+            "capture_FR",
+            "playback_FL",
+            "monitor_FL",
+            "playback_FR",
+            "monitor_FR",
+        }
+    ): ("capture_FL", "capture_FR"),
+    # Firefox
+    frozenset({"output_FL", "output_FR"}): ("output_FL", "output_FR"),
+    # Liesl
+    frozenset({"playback_FL", "monitor_FL", "playback_FR", "monitor_FR"}): (
+        "monitor_FL",
+        "monitor_FR",
+    ),
+    # Playback
+    frozenset({"playback_FL", "capture_FL", "playback_FR", "capture_FR"}): (
+        "capture_FL",
+        "capture_FR",
+    ),
+    # Blue Microphones Pro
+    frozenset(
+        {
+            "playback_AUX0",
+            "monitor_AUX0",
+            "capture_AUX0",
+            "capture_AUX1",
+            "monitor_AUX1",
+            "playback_AUX1",
+        }
+    ): ("capture_AUX0", "capture_AUX1"),
+    frozenset(
+        {"playback_AUX0", "capture_AUX0", "capture_AUX1", "playback_AUX1"}
+    ): ("capture_AUX0", "capture_AUX1"),
+}
+
+_STEREO_SPEAKER_TABLE: Dict[FrozenSet[str], Tuple[str, str]] = {
+    # Built-in Audio Analog Stereo
+    frozenset(
+        {
+            "capture_FL",
+            "capture_FR",
+            "playback_FL",
+            "monitor_FL",
+            "playback_FR",
+            "monitor_FR",
+        }
+    ): ("playback_FL", "playback_FR"),
+    # Liesl
+    frozenset({"playback_FL", "monitor_FL", "playback_FR", "monitor_FR"}): (
+        "playback_FL",
+        "playback_FR",
+    ),
+    # Playback
+    frozenset({"playback_FL", "capture_FL", "playback_FR", "capture_FR"}): (
+        "playback_FL",
+        "playback_FR",
+    ),
+    # Blue Yeti
+    frozenset(
+        {
+            "capture_AUX0",
+            "capture_AUX1",
+            "monitor_AUX0",
+            "monitor_AUX1",
+            "playback_AUX0",
+            "playback_AUX1",
+        }
+    ): ("playback_AUX0", "playback_AUX1"),
+    frozenset(
+        {"capture_AUX0", "capture_AUX1", "playback_AUX0", "playback_AUX1"}
+    ): ("playback_AUX0", "playback_AUX1"),
+}
+
+
 class PortMan:
     name = "PortMan"
     samplerate: int
@@ -169,34 +314,79 @@ class PortMan:
 
     def __init__(self) -> None:
         self._real_remote_client: Dict[str, str] = {}
-        self._graph_order_callback: List[Callable[[], None]] = []
+        # Interned PortRefs: identical (client, subclient, port) triples
+        # share one object, so refs stay cheap as dict keys even when the
+        # per-port-name cache below has evicted them.
+        self._portref_intern: Dict[Tuple[str, str, str], PortRef] = {}
+        self._graph_order_callback: Dict[int, Callable[[], None]] = {}
+        # Guards self.clients and the derived indexes, which the JACK
+        # callback thread mutates while the UI thread reads them.
+        self._graph_lock = threading.RLock()
+        self._clients_version = 0
+        self._sorted_names_version = -1
+        self._sorted_names: List[str] = []
+        self._cache_gen = 0
 
     @contextlib.contextmanager
     def graph_order_callback(self, f: Callable[[], None]) -> Iterator[None]:
-        self._graph_order_callback.append(f)
+        k = id(f)
+        self._graph_order_callback[k] = f
         try:
             yield
         finally:
-            try:
-                self._graph_order_callback.remove(f)
-            except ValueError:
-                traceback.print_exc()
+            self._graph_order_callback.pop(k, None)
 
     def __enter__(self) -> "PortMan":
         self.clients: Dict[str, Client] = {}
+        self._conns_by_pair: Dict[Tuple[PortRef, PortRef], None] = {}
+        self._stereo_outs_cache: Dict[str, List[PortRef]] = {}
+        self._stereo_speakers_cache: Dict[str, List[PortRef]] = {}
         self.register()
         return self
         
     def register(self) -> None:
         pass
 
-    graph_reordered: Optional[threading.Event] = None
+    _reorder_cv: Optional[threading.Condition] = None
+    _reorder_deadline: Optional[float] = None
+    _reorder_stop = False
+    # True whenever the JACK graph may have changed since the TUI last
+    # rebuilt its key config.
+    _graph_dirty = True
+    # While > 0, graph-reorder callbacks are held back; they fire once
+    # when the outermost batching() block exits.
+    _batching = 0
+    _batch_pending = False
+
+    @contextlib.contextmanager
+    def batching(self) -> Iterator[None]:
+        """Defer graph-reorder handling until this block finishes.
+
+        A preset touching N connections would otherwise trigger N reorder
+        storms, each re-reading the whole graph; with batching the
+        callbacks run once, after the last connect/disconnect.
+        """
+        cv = self._reorder_cv
+        if cv is None:
+            yield
+            return
+        with cv:
+            self._batching += 1
+        try:
+            yield
+        finally:
+            with cv:
+                self._batching -= 1
+                if not self._batching and self._batch_pending:
+                    self._batch_pending = False
+                    self._reorder_deadline = time.monotonic()
+                    cv.notify()
 
     def __exit__(self, exb, exv, ext) -> None:
-        if self.graph_reordered is not None:
-            g = self.graph_reordered
-            self.graph_reordered = None
-            g.set()
+        if self._reorder_cv is not None:
+            with self._reorder_cv:
+                self._reorder_stop = True
+                self._reorder_cv.notify()
         if exb is None:
             self.unregister()
 
@@ -210,21 +400,29 @@ class PortMan:
     def print_all_ports(self) -> None:
         for client_name, client in self.clients.items():
             print(client_name)
-            print("{%s}" % ", ".join(repr(p.port_name) for p in client["ports"]))
+            print("{%s}" % ", ".join(repr(p.port_name) for p in client.ports))
 
     def print_all_connections(self) -> None:
         for client_name, client in self.clients.items():
             print(client_name)
-            for port_ref, port in client["ports"].items():
+            for port_ref, port in client.ports.items():
                 print(f"- {port_ref.port_name}")
-                for n in port["connections"]:
+                for n in port.connections:
                     print(f"  -> {n.subclient_name}:{n.port_name}")
 
+    def sorted_client_names(self) -> List[str]:
+        with self._graph_lock:
+            if self._sorted_names_version != self._clients_version:
+                self._sorted_names = sorted(self.clients)
+                self._sorted_names_version = self._clients_version
+            return self._sorted_names
+
     def stereo_out_ref(
         self, client_name: str, channels: Optional[Sequence[str]] = None
     ) -> List[PortRef]:
-        client = self.clients[client_name]
-        ports = {p.port_name: p for p in client["ports"]}
+        with self._graph_lock:
+            client = self.clients[client_name]
+            ports = {p.port_name: p for p in client.ports}
         if channels is not None:
             ports = {n: p for n, p in ports.items() if "playback" not in n}
             if any("capture" in n for n in ports):
@@ -235,50 +433,42 @@ class PortMan:
                 p, = [p for n, p in ports.items() if c in n]
                 res.append(p)
             return res
-        port_names = set(ports.keys())
-        # Built-in Audio Analog Stereo
-        if port_names == {
-            "capture_FL",
-            "capture_FR",
-            "playback_FL",
-            "monitor_FL",
-            "playback_FR",
-            "monitor_FR",
-        }:
-            return [ports["capture_FL"], ports["capture_FR"]]
-        # Firefox
-        if port_names == {"output_FL", "output_FR"}:
-            return [ports["output_FL"], ports["output_FR"]]
-        # Liesl
-        if port_names == {"playback_FL", "monitor_FL", "playback_FR", "monitor_FR"}:
-            return [ports["monitor_FL"], ports["monitor_FR"]]
-        # Playback
-        if port_names == {"playback_FL", "capture_FL", "playback_FR", "capture_FR"}:
-            return [ports["capture_FL"], ports["capture_FR"]]
-        # Blue Microphones Pro
-        if port_names == {
-            "playback_AUX0",
-            "monitor_AUX0",
-            "capture_AUX0",
-            "capture_AUX1",
-            "monitor_AUX1",
-            "playback_AUX1",
-        }:
-            return [ports["capture_AUX0"], ports["capture_AUX1"]]
-        if port_names == {
-            "playback_AUX0",
-            "capture_AUX0",
-            "capture_AUX1",
-            "playback_AUX1",
-        }:
-            return [ports["capture_AUX0"], ports["capture_AUX1"]]
-        raise Exception("Don't know how to get a stereo ref from %r" % port_names)
+        res2 = self.try_stereo_out_ref(client_name)
+        if res2 is None:
+            raise Exception(
+                "Don't know how to get a stereo ref from %r" % set(ports.keys())
+            )
+        return res2
+
+    def _compute_stereo_ref(
+        self,
+        client_name: str,
+        table: Dict[FrozenSet[str], Tuple[str, str]],
+    ) -> Optional[List[PortRef]]:
+        with self._graph_lock:
+            client = self.clients.get(client_name)
+            if client is None:
+                return None
+            ports = {p.port_name: p for p in client.ports}
+        pair = table.get(frozenset(ports))
+        if pair is None:
+            return None
+        return [ports[pair[0]], ports[pair[1]]]
+
+    def try_stereo_out_ref(self, client_name: str) -> Optional[List[PortRef]]:
+        # Served from the cache kept current by the graph callbacks;
+        # recompute only for clients the cache has no answer for.
+        try:
+            return self._stereo_outs_cache[client_name]
+        except KeyError:
+            return self._compute_stereo_ref(client_name, _STEREO_OUT_TABLE)
 
     def stereo_speaker_ref(
         self, client_name: str, channels: Optional[Sequence[str]] = None
     ) -> List[PortRef]:
-        client = self.clients[client_name]
-        ports = {p.port_name: p for p in client["ports"]}
+        with self._graph_lock:
+            client = self.clients[client_name]
+            ports = {p.port_name: p for p in client.ports}
         if channels is not None:
             ports = {n: p for n, p in ports.items() if "playback" in n}
             res = []
@@ -289,61 +479,44 @@ class PortMan:
                     raise Exception("Couldn't find port that contains %r among %r" % (c, ports.keys()))
                 res.append(p)
             return res
-        port_names = set(ports.keys())
-        # Built-in Audio Analog Stereo
-        if port_names == {
-            "capture_FL",
-            "capture_FR",
-            "playback_FL",
-            "monitor_FL",
-            "playback_FR",
-            "monitor_FR",
-        }:
-            return [ports["playback_FL"], ports["playback_FR"]]
-        # Liesl
-        if port_names == {"playback_FL", "monitor_FL", "playback_FR", "monitor_FR"}:
-            return [ports["playback_FL"], ports["playback_FR"]]
-        # Playback
-        if port_names == {"playback_FL", "capture_FL", "playback_FR", "capture_FR"}:
-            return [ports["playback_FL"], ports["playback_FR"]]
-        # Blue Yeti
-        if port_names == {
-            "capture_AUX0",
-            "capture_AUX1",
-            "monitor_AUX0",
-            "monitor_AUX1",
-            "playback_AUX0",
-            "playback_AUX1",
-        }:
-            return [ports["playback_AUX0"], ports["playback_AUX1"]]
-        if port_names == {
-            "capture_AUX0",
-            "capture_AUX1",
-            "playback_AUX0",
-            "playback_AUX1",
-        }:
-            return [ports["playback_AUX0"], ports["playback_AUX1"]]
-        raise Exception(
-            "Don't know how to get a stereo ref from %r" % ",".join(sorted(port_names))
-        )
+        res2 = self.try_stereo_speaker_ref(client_name)
+        if res2 is None:
+            raise Exception(
+                "Don't know how to get a stereo ref from %r"
+                % ",".join(sorted(ports.keys()))
+            )
+        return res2
+
+    def try_stereo_speaker_ref(self, client_name: str) -> Optional[List[PortRef]]:
+        try:
+            return self._stereo_speakers_cache[client_name]
+        except KeyError:
+            return self._compute_stereo_ref(client_name, _STEREO_SPEAKER_TABLE)
+
+    def _update_stereo_caches(self, client_name: str) -> None:
+        if client_name not in self.clients:
+            self._stereo_outs_cache.pop(client_name, None)
+            self._stereo_speakers_cache.pop(client_name, None)
+            return
+        ref = self._compute_stereo_ref(client_name, _STEREO_OUT_TABLE)
+        if ref is None:
+            self._stereo_outs_cache.pop(client_name, None)
+        else:
+            self._stereo_outs_cache[client_name] = ref
+        ref = self._compute_stereo_ref(client_name, _STEREO_SPEAKER_TABLE)
+        if ref is None:
+            self._stereo_speakers_cache.pop(client_name, None)
+        else:
+            self._stereo_speakers_cache[client_name] = ref
 
     def stereo_outs(self) -> Dict[str, List[PortRef]]:
-        res = {}
-        for client_name in self.clients:
-            try:
-                res[client_name] = self.stereo_out_ref(client_name)
-            except Exception:
-                pass
-        return res
+        # Copy under the lock; the callback thread mutates the cache.
+        with self._graph_lock:
+            return dict(self._stereo_outs_cache)
 
     def stereo_speakers(self) -> Dict[str, List[PortRef]]:
-        res = {}
-        for client_name in self.clients:
-            try:
-                res[client_name] = self.stereo_speaker_ref(client_name)
-            except Exception:
-                pass
-        return res
+        with self._graph_lock:
+            return dict(self._stereo_speakers_cache)
 
     def connection_track(self, a: PortRef, b: PortRef) -> ConnectionTrack:
         return ConnectionTrack(self, a, b)
@@ -358,22 +531,32 @@ class PortMan:
 
     @staticmethod
     def set_default_sink(client_name: str) -> None:
-        items = {}
-        cmdline = "pactl list sinks"
-        stdout = subprocess.check_output(cmdline, shell=True, universal_newlines=True)
-        for line in stdout.splitlines():
-            if not line.strip():
-                continue
-            if not line.startswith("\t"):
-                items = {}
-                continue
-            if line.startswith(("\t\t", "\t ")):
-                continue
-            assert ":" in line, line
-            k, v = line.split(":", 1)
-            items[k.strip()] = v.strip()
-            if k.strip() == "Description" and v.strip() == client_name:
-                break
-        else:
-            raise Exception("Client not found in output of %s" % cmdline)
-        subprocess.check_call(("pactl", "set-default-sink", items["Name"]))
+        try:
+            name = _pactl_sinks()[client_name]
+        except KeyError:
+            raise Exception(
+                "Client %r not found in output of pactl list sinks" % client_name
+            )
+        subprocess.check_call(("pactl", "set-default-sink", name))
+
+
+_sink_cache: Optional[Tuple[float, Dict[str, str]]] = None
+_SINK_CACHE_TTL = 5.0
+
+
+def _pactl_sinks() -> Dict[str, str]:
+    """Map sink descriptions to sink names, cached briefly.
+
+    Forking pactl costs tens of milliseconds; the sink list only changes
+    on (un)plug events, so repeat calls within the TTL reuse the parse.
+    """
+    global _sink_cache
+    now = time.monotonic()
+    if _sink_cache is not None and now - _sink_cache[0] < _SINK_CACHE_TTL:
+        return _sink_cache[1]
+    stdout = subprocess.check_output(
+        ("pactl", "--format=json", "list", "sinks"), universal_newlines=True
+    )
+    sinks = {s["description"]: s["name"] for s in json.loads(stdout)}
+    _sink_cache = (now, sinks)
+    return sinks
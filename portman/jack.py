@@ -1,15 +1,18 @@
+import concurrent.futures
 import threading
+import time
 import traceback
 from typing import Dict, Optional
 
 import jack
 
-from .base import PortMan, Client, PortRef
+from .base import Client, Port, PortMan, PortRef
 
 
 class PortManJack(PortMan):
     def register(self) -> None:
         super().register()
+        self._ref_cache: Dict[str, PortRef] = {}
 
         @jack.set_error_function
         def error(msg):
@@ -50,40 +53,54 @@ class PortManJack(PortMan):
 
         @jackconn.set_client_registration_callback
         def client_registration(client_name, register):
-            if register:
-                self.clients.setdefault(client_name, {"ports": {}})
-            else:
-                self.clients.pop(client_name, None)
+            with self._graph_lock:
+                if register:
+                    self.clients.setdefault(client_name, Client())
+                else:
+                    self.clients.pop(client_name, None)
+                self._clients_version += 1
+                self._update_stereo_caches(client_name)
 
         @jackconn.set_port_registration_callback
         def port_registration(port: jack.Port, register):
             port_ref = self._jack_port_name_to_ref(port.name)
-            client = self.clients.setdefault(port_ref.client_name, {"ports": {}})
-            if register:
-                client["ports"].setdefault(port_ref, {"connections": {}})
-            else:
-                client["ports"].pop(port_ref, None)
+            with self._graph_lock:
+                client = self.clients.setdefault(port_ref.client_name, Client())
+                if register:
+                    client.ports.setdefault(port_ref, Port())
+                else:
+                    client.ports.pop(port_ref, None)
+                    self._ref_cache.pop(port.name, None)
+                self._clients_version += 1
+                self._update_stereo_caches(port_ref.client_name)
 
         @jackconn.set_port_connect_callback
         def port_connect(a: jack.Port, b: jack.Port, connect):
             a_ref = self._jack_port_name_to_ref(a.name)
             b_ref = self._jack_port_name_to_ref(b.name)
-            a_client = self.clients.setdefault(a_ref.client_name, {"ports": {}})
-            b_client = self.clients.setdefault(b_ref.client_name, {"ports": {}})
-            a_ports = a_client["ports"]
-            b_ports = b_client["ports"]
-            try:
-                a_port = a_ports[a_ref]
-                b_port = b_ports[b_ref]
-            except KeyError:
-                print(f"Port connect/disconnect between unknown ports: {a!r} {b!r}")
-                return
-            if connect:
-                b_port["connections"][a_ref] = None
-                a_port["connections"][b_ref] = None
-            else:
-                b_port["connections"].pop(a_ref, None)
-                a_port["connections"].pop(b_ref, None)
+            with self._graph_lock:
+                a_client = self.clients.setdefault(a_ref.client_name, Client())
+                b_client = self.clients.setdefault(b_ref.client_name, Client())
+                a_ports = a_client.ports
+                b_ports = b_client.ports
+                try:
+                    a_port = a_ports[a_ref]
+                    b_port = b_ports[b_ref]
+                except KeyError:
+                    print(
+                        f"Port connect/disconnect between unknown ports: {a!r} {b!r}"
+                    )
+                    return
+                if connect:
+                    b_port.connections.add(a_ref)
+                    a_port.connections.add(b_ref)
+                    self._conns_by_pair[a_ref, b_ref] = None
+                    self._conns_by_pair[b_ref, a_ref] = None
+                else:
+                    b_port.connections.discard(a_ref)
+                    a_port.connections.discard(b_ref)
+                    self._conns_by_pair.pop((a_ref, b_ref), None)
+                    self._conns_by_pair.pop((b_ref, a_ref), None)
 
         try:
 
@@ -94,22 +111,43 @@ class PortManJack(PortMan):
         except AttributeError:
             print("Could not register port rename callback (not available on JACK1).")
 
-        self.graph_reordered: Optional[threading.Event] = threading.Event()
+        self._reorder_cv = threading.Condition()
+        self._reorder_deadline = None
+        self._reorder_gen = 0
+        self._reorder_stop = False
 
         def graph_reordered_thread():
-            while self.graph_reordered is not None:
-                self.graph_reordered.wait()
-                # print("\r\x1b[Kgraph_reordered - wait for it to settle...")
-                if self.graph_reordered is None:
-                    return
-                self.graph_reordered.clear()
-                while self.graph_reordered.wait(0.05):
-                    # print("\r\x1b[Kgraph_reordered - woop")
-                    if self.graph_reordered is None:
+            cv = self._reorder_cv
+            gen_seen = 0
+            while True:
+                with cv:
+                    while self._reorder_deadline is None and not self._reorder_stop:
+                        cv.wait()
+                    if self._reorder_stop:
                         return
-                    self.graph_reordered.clear()
-                # print("\r\x1b[Kgraph_reordered")
-                for f in self._graph_order_callback:
+                    # Wait for the burst to settle; every new event pushes
+                    # the deadline forward, and we only run the callbacks
+                    # once things have been quiet past the deadline.
+                    while True:
+                        remaining = self._reorder_deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._reorder_deadline = None
+                            break
+                        cv.wait(remaining)
+                        if self._reorder_stop:
+                            return
+                    if self._batching:
+                        # A batching() block is active; it re-arms the
+                        # deadline when the outermost block exits.
+                        self._batch_pending = True
+                        continue
+                    gen = self._reorder_gen
+                if gen == gen_seen:
+                    continue
+                gen_seen = gen
+                self._cache_gen += 1
+                self._graph_dirty = True
+                for f in list(self._graph_order_callback.values()):
                     try:
                         f()
                     except Exception:
@@ -119,8 +157,16 @@ class PortManJack(PortMan):
 
         @jackconn.set_graph_order_callback
         def graph_order():
-            if self.graph_reordered is not None:
-                self.graph_reordered.set()
+            cv = self._reorder_cv
+            if cv is None:
+                return
+            with cv:
+                self._reorder_gen += 1
+                # Only wake the worker when arming a fresh deadline; while
+                # one is armed the worker re-checks it after its timed wait.
+                if self._reorder_deadline is None:
+                    cv.notify()
+                self._reorder_deadline = time.monotonic() + 0.05
 
         @jackconn.set_xrun_callback
         def xrun(delay):
@@ -150,22 +196,54 @@ class PortManJack(PortMan):
             print(e)
 
         jackconn.__enter__()
-        for port in jackconn.get_ports():
-            ref = self._jack_port_name_to_ref(port.name)
-            # print(repr(port), repr(ref))
-            portconns = self.clients.setdefault(ref.client_name, {"ports": {}})[
-                "ports"
-            ].setdefault(ref, {"connections": {}})["connections"]
-            assert port.shortname == ref.port_name, (port.shortname, port.name)
-            for connection in jackconn.get_all_connections(port):
-                connref = self._jack_port_name_to_ref(connection.name)
-                portconns[connref] = None
+        ports = jackconn.get_ports()
+        # Resolve every remote client name up front; the per-client UUID
+        # round trips are I/O-bound, so do them in parallel rather than
+        # one by one as _jack_port_name_to_ref first encounters them.
+        remote_names = {p.name.split(":", 1)[0] for p in ports}
+        remote_names -= set(self._real_remote_client)
+
+        def resolve(remote_client: str) -> Optional[str]:
+            try:
+                return jackconn.get_client_name_by_uuid(
+                    jackconn.get_uuid_for_client_name(remote_client)
+                )
+            except jack.JackError:
+                return None
+
+        if remote_names:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as ex:
+                for remote_client, real_client in zip(
+                    remote_names, ex.map(resolve, remote_names)
+                ):
+                    if real_client is not None:
+                        self._real_remote_client[remote_client] = real_client
+        with self._graph_lock:
+            for port in ports:
+                ref = self._jack_port_name_to_ref(port.name)
+                # print(repr(port), repr(ref))
+                portconns = (
+                    self.clients.setdefault(ref.client_name, Client())
+                    .ports.setdefault(ref, Port())
+                    .connections
+                )
+                assert port.shortname == ref.port_name, (port.shortname, port.name)
+                for connection in jackconn.get_all_connections(port):
+                    connref = self._jack_port_name_to_ref(connection.name)
+                    portconns.add(connref)
+                    self._conns_by_pair[ref, connref] = None
+            for client_name in self.clients:
+                self._update_stereo_caches(client_name)
 
     def unregister(self):
         self._conn.__exit__(None, None, None)
         super().unregister()
 
     def _jack_port_name_to_ref(self, port_name: str) -> PortRef:
+        try:
+            return self._ref_cache[port_name]
+        except KeyError:
+            pass
         remote_client, shortname = port_name.split(":", 1)
         try:
             real_client = self._real_remote_client[remote_client]
@@ -175,4 +253,10 @@ class PortManJack(PortMan):
             ] = self._conn.get_client_name_by_uuid(
                 self._conn.get_uuid_for_client_name(remote_client)
             )
-        return PortRef(real_client, remote_client, shortname)
+        key = (real_client, remote_client, shortname)
+        try:
+            ref = self._portref_intern[key]
+        except KeyError:
+            ref = self._portref_intern[key] = PortRef(*key)
+        self._ref_cache[port_name] = ref
+        return ref
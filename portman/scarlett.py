@@ -1,13 +1,87 @@
 #!/usr/bin/env python3
 import string
 from typing import (
+    Any,
+    Dict,
     List,
     Optional,
+    Sequence,
+    Tuple,
 )
 
 import pyscarlett
-from portman.base import MultiConnectionTrack, ConnectionTrackProtocol
-from portman.alsa import PyalsaaudioEnumTrack, PyalsaaudioVolumeTrack 
+from portman.base import MultiConnectionTrack, ConnectionTrackProtocol, PortMan
+from portman.alsa import PyalsaaudioEnumTrack, PyalsaaudioVolumeTrack
+
+
+def require_scarlett_client(
+    pm: PortMan,
+    brand_name: str = "Scarlett",
+    model: str = "4i4",
+    suffix: str = "USB Pro",
+) -> str:
+    """Return the expected JACK client name, or SystemExit with a hint.
+
+    Walks pm.clients once, remembering the closest near-miss so the
+    error can say whether the device is in the wrong mode, is an
+    unsupported model, or simply absent.
+    """
+    device_name = f"{brand_name} {model}"
+    client_name = f"{device_name} {suffix}"
+    if client_name in pm.clients:
+        return client_name
+    found_brand = found_device = None
+    for c in pm.clients:
+        if device_name in c:
+            found_device = c
+            break
+        if found_brand is None and brand_name in c:
+            found_brand = c
+    if found_device:
+        raise SystemExit(
+            "Couldn't find %r, " % client_name
+            + "but did find %r.\n" % found_device
+            + "Maybe you need to set the device to "
+            + "'Pro Audio' mode?"
+        )
+    elif found_brand:
+        raise SystemExit(
+            "Couldn't find %r, " % client_name
+            + "but did find %r, " % found_brand
+            + "which is not a supported model for this script."
+        )
+    raise SystemExit("Couldn't find %r - " % client_name + "is it connected?")
+
+
+def build_scarlett_preset(
+    scarlett: "Scarlett",
+    pcm_outputs: Sequence[Optional[str]],
+    analogue_outputs: Sequence[Optional[str]],
+    mixer_inputs: Sequence[Optional[str]],
+    mix_rows: Sequence[Sequence[Optional[int]]],
+) -> ConnectionTrackProtocol:
+    """Assemble the pcm/analogue/mix preset shared by the TUI scripts.
+
+    Memoized per Scarlett, so toggling the same preset off and on (or
+    re-entering a script) reuses the already-built track graph instead
+    of reconstructing it.
+    """
+    key = (
+        "preset",
+        tuple(pcm_outputs),
+        tuple(analogue_outputs),
+        tuple(mixer_inputs),
+        tuple(tuple(r) for r in mix_rows),
+    )
+    try:
+        return scarlett._track_cache[key]
+    except KeyError:
+        t = scarlett._track_cache[key] = MultiConnectionTrack(
+            scarlett.set_pcm_outputs(*pcm_outputs),
+            scarlett.set_analogue_outputs(*analogue_outputs),
+            scarlett.set_mix(list(mixer_inputs), *(list(r) for r in mix_rows)),
+        )
+        return t
 
 
 class Scarlett:
@@ -18,6 +92,11 @@ class Scarlett:
         self.inputs = self.channels["inputs"]
         self.outputs = self.channels["outputs"]
         self.mixes = self.channels["mixes"]
+        # switch_*() results keyed by their constructor args. Presets and
+        # conf() rebuilds ask for the same controls over and over; reusing
+        # the track keeps its cached mixer state warm instead of starting
+        # every rebuild cold.
+        self._track_cache: Dict[Tuple[Any, ...], ConnectionTrackProtocol] = {}
 
     def set_analogue_outputs(self, *args: Optional[str]) -> ConnectionTrackProtocol:
         assert len(args) == self.outputs
@@ -62,35 +141,55 @@ class Scarlett:
         self, output_index: int, on_state: str
     ) -> ConnectionTrackProtocol:
         assert 0 <= output_index < self.outputs
-        return PyalsaaudioEnumTrack(
-            self.card_index,
-            "Analogue Output %02d" % (1 + output_index),
-            "Off",
-            on_state,
-        )
+        key = ("analogue_output", output_index, on_state)
+        try:
+            return self._track_cache[key]
+        except KeyError:
+            t = self._track_cache[key] = PyalsaaudioEnumTrack(
+                self.card_index,
+                "Analogue Output %02d" % (1 + output_index),
+                "Off",
+                on_state,
+            )
+            return t
 
     def switch_pcm_output(
         self, output_index: int, on_state: str
     ) -> ConnectionTrackProtocol:
         assert 0 <= output_index < self.pcms
-        return PyalsaaudioEnumTrack(
-            self.card_index, "PCM %02d" % (1 + output_index), "Off", on_state
-        )
+        key = ("pcm_output", output_index, on_state)
+        try:
+            return self._track_cache[key]
+        except KeyError:
+            t = self._track_cache[key] = PyalsaaudioEnumTrack(
+                self.card_index, "PCM %02d" % (1 + output_index), "Off", on_state
+            )
+            return t
 
     def switch_mixer_input(self, inp: int, on_state: str) -> ConnectionTrackProtocol:
         assert 1 <= inp <= self.inputs
-        return PyalsaaudioEnumTrack(
-            self.card_index, "Mixer Input %02d" % inp, "Off", on_state
-        )
+        key = ("mixer_input", inp, on_state)
+        try:
+            return self._track_cache[key]
+        except KeyError:
+            t = self._track_cache[key] = PyalsaaudioEnumTrack(
+                self.card_index, "Mixer Input %02d" % inp, "Off", on_state
+            )
+            return t
 
     def switch_mix(
         self, mix: str, inp: int, volume: int = 100
     ) -> ConnectionTrackProtocol:
         assert 1 <= inp <= self.inputs
         assert ord("A") <= ord(mix) < ord("A") + self.mixes
-        return PyalsaaudioVolumeTrack(
-            self.card_index, f"Mix {mix} Input {inp:02d}", volume
-        )
+        key = ("mix", mix, inp, volume)
+        try:
+            return self._track_cache[key]
+        except KeyError:
+            t = self._track_cache[key] = PyalsaaudioVolumeTrack(
+                self.card_index, f"Mix {mix} Input {inp:02d}", volume
+            )
+            return t
 
     def switch_mix_stereo(
         self, mixmix: str, inpinp: int, volume: int = 100
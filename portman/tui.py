@@ -1,13 +1,20 @@
 #!/usr/bin/env python3
 import contextlib
 import os
+import queue
+import select
 import sys
 import termios
+import threading
+import traceback
 import tty
 from typing import (
     Callable,
     Dict,
     Iterator,
+    List,
+    Optional,
+    Tuple,
 )
 
 from portman.base import ConnectionTrackProtocol, PortMan
@@ -15,21 +22,30 @@ from portman.base import ConnectionTrackProtocol, PortMan
 
 @contextlib.contextmanager
 def get_rawchars() -> Iterator[Iterator[str]]:
+    fd = sys.stdin.fileno()
+
     def gen():
         while True:
-            c = sys.stdin.read(1)
-            if ord(c) == 3:
-                break
-            yield c
+            # Pull every pending byte with one read so autorepeat/paste
+            # bursts cost a single syscall instead of one per keystroke.
+            select.select([fd], [], [])
+            data = os.read(fd, 4096)
+            if not data:
+                return
+            for b in data:
+                if b == 3:
+                    return
+                yield chr(b)
 
-    fd = sys.stdin.fileno()
     old = termios.tcgetattr(fd)
     # new = termios.tcgetattr(fd)
     # new[3] = new[3] & ~termios.ECHO          # lflags
     try:
         tty.setraw(fd)
+        os.set_blocking(fd, False)
         yield gen()
     finally:
+        os.set_blocking(fd, True)
         termios.tcsetattr(fd, termios.TCSADRAIN, old)
 
 
@@ -55,19 +71,35 @@ def tuiwrapper(fn: Callable[[PortMan], TuiConf]) -> Callable[[], None]:
             conf = fn(pm)
 
             keys: TuiKeys = {}
+            status_pairs: List[Tuple[str, str, ConnectionTrackProtocol]] = []
+            # Raw byte -> track, covering both cases of each key; rebuilt
+            # together with keys so the read loop is one list index per
+            # keystroke.
+            dispatch: List[Optional[ConnectionTrackProtocol]] = [None] * 256
 
             def get_the_status() -> str:
-                return "".join(
-                    c.upper() if v.get() else c.lower() for c, v in keys.items()
-                )
+                return "".join(u if v.get() else l for u, l, v in status_pairs)
 
             def update_the_status() -> None:
-                nonlocal keys
+                nonlocal keys, status_pairs, dispatch
+                if not pm._graph_dirty and keys:
+                    # Keypress-only refresh: the key config can only change
+                    # with the graph, so skip rebuilding it.
+                    print("\r\x1b[K" + get_the_status(), end="", flush=True)
+                    return
+                pm._graph_dirty = False
                 keys2 = conf()
                 if keys2 == keys:
                     print("\r\x1b[K" + get_the_status(), end="", flush=True)
                     return
                 keys = keys2
+                status_pairs = [
+                    (c.upper(), c.lower(), v) for c, v in keys.items()
+                ]
+                d: List[Optional[ConnectionTrackProtocol]] = [None] * 256
+                for c, v in keys.items():
+                    d[ord(c.lower())] = d[ord(c.upper())] = v
+                dispatch = d
                 print("", end="\r\n")
                 print("", end="\r\n")
                 for c, v in keys.items():
@@ -75,17 +107,47 @@ def tuiwrapper(fn: Callable[[PortMan], TuiConf]) -> Callable[[], None]:
                 print("", end="\r\n")
                 print("\r\x1b[K" + get_the_status(), end="", flush=True)
 
-            print("")
-            update_the_status()
-
-            with pm.graph_order_callback(update_the_status):
-                with get_rawchars() as rawchars:
-                    for c in rawchars:
-                        # print("\r\x1b[K%s" % c)
-                        if c.upper() in keys:
-                            track = keys[c.upper()]
-                            track.set(not track.get())
+            # Refreshing the status can serialize many ALSA/JACK round
+            # trips, so it runs on a worker thread; the keystroke loop and
+            # the graph-order callback just post a token. The queue holds
+            # at most one token, which coalesces bursts of events.
+            refresh_q: "queue.Queue[object]" = queue.Queue(maxsize=1)
+            stop_token = object()
+
+            def request_refresh() -> None:
+                try:
+                    refresh_q.put_nowait(None)
+                except queue.Full:
+                    pass
+
+            def refresh_worker() -> None:
+                while True:
+                    token = refresh_q.get()
+                    if token is stop_token:
+                        return
+                    try:
                         update_the_status()
+                    except Exception:
+                        traceback.print_exc()
+
+            print("")
+            worker = threading.Thread(target=refresh_worker)
+            worker.start()
+            request_refresh()
+
+            try:
+                with pm.graph_order_callback(request_refresh):
+                    with get_rawchars() as rawchars:
+                        for c in rawchars:
+                            # print("\r\x1b[K%s" % c)
+                            o = ord(c)
+                            track = dispatch[o] if o < 256 else None
+                            if track is not None:
+                                track.set(not track.get())
+                            request_refresh()
+            finally:
+                refresh_q.put(stop_token)
+                worker.join()
 
         print("")
 
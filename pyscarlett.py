@@ -1,22 +1,41 @@
 import argparse
+import functools
+import re
 import string
-from typing import Any, Iterable, Optional, TypedDict
+import sys
+from typing import Dict, Optional, Set, Tuple, TypedDict
 
 import alsaaudio
 
 
 parser = argparse.ArgumentParser()
 
+# Opening a Mixer walks the card's whole control hierarchy in libasound,
+# so keep one handle per (card, control) instead of reopening per read.
+_mixer_cache: Dict[Tuple[int, str], alsaaudio.Mixer] = {}
+# getrange() is constant per element; remember it alongside the handle.
+_range_cache: Dict[Tuple[int, str], Tuple[int, int]] = {}
+# Element capabilities are static too: "enum", "mute", "rec" or "volume",
+# classified on first sight so later dumps skip the capability queries.
+_kind_cache: Dict[Tuple[int, str], str] = {}
 
-def howmany(ss: Iterable[str], tpl: str, elms: Iterable[Any]) -> int:
-    s = set(ss)
-    for i, x in enumerate(elms):
-        e = tpl % (x,)
-        if e not in s:
-            if i == 0:
-                raise Exception("%r not found" % (e,))
-            return i
-    raise Exception("howmany: Upper limit not hit")
+
+def _get_mixer(card_index: int, name: str) -> alsaaudio.Mixer:
+    try:
+        return _mixer_cache[card_index, name]
+    except KeyError:
+        _mixer_cache[card_index, name] = m = alsaaudio.Mixer(name, 0, card_index)
+        return m
+
+
+def _get_range(card_index: int, name: str) -> Tuple[int, int]:
+    try:
+        return _range_cache[card_index, name]
+    except KeyError:
+        _range_cache[card_index, name] = r = _get_mixer(
+            card_index, name
+        ).getrange()
+        return r
 
 
 def main() -> None:
@@ -25,6 +44,9 @@ def main() -> None:
     get_and_dump()
 
 
+# Card indices only change on hotplug, which for this hardware means
+# replugging the interface and restarting anyway; cache the scan.
+@functools.lru_cache(maxsize=1)
 def get_scarlett_card_index() -> Optional[int]:
     for card_index in alsaaudio.card_indexes():
         a, b = alsaaudio.card_name(card_index)
@@ -65,6 +87,10 @@ C_PCM = "PCM %02d"
 C_INPUT = "Mixer Input %02d"
 C_OUTPUT = "Analogue Output %02d"
 C_MIX = "Mix %s Input %02d"
+RE_PCM = re.compile(r"PCM (\d+)\Z")
+RE_INPUT = re.compile(r"Mixer Input (\d+)\Z")
+RE_OUTPUT = re.compile(r"Analogue Output (\d+)\Z")
+RE_MIX = re.compile(r"Mix ([A-Z]) Input (\d+)\Z")
 
 
 def get_and_dump() -> int:
@@ -84,25 +110,68 @@ def get_channels() -> ScarlettChannels:
             "No mixers available for %s. Are you running a kernel with the right driver support?"
             % a
         )
-    pcms = howmany(mixer_names, C_PCM, range(1, 100))
-    inputs = howmany(mixer_names, C_INPUT, range(1, 100))
-    outputs = howmany(mixer_names, C_OUTPUT, range(1, 100))
-    mixes = howmany(mixer_names, C_MIX % ("%s", 1), string.ascii_uppercase)
-    missing = set(FIXED) - set(mixer_names)
+    # Classify every name in one pass, then derive the family sizes as
+    # the contiguous index runs starting at 1 (or A for the mixes).
+    fixed = set(FIXED)
+    seen_fixed = set()
+    pcm_idx: Set[int] = set()
+    input_idx: Set[int] = set()
+    output_idx: Set[int] = set()
+    mix_cells: Set[Tuple[str, int]] = set()
+    unexpected = []
+    for name in mixer_names:
+        if name in fixed:
+            seen_fixed.add(name)
+            continue
+        m = RE_PCM.match(name)
+        if m:
+            pcm_idx.add(int(m.group(1)))
+            continue
+        m = RE_INPUT.match(name)
+        if m:
+            input_idx.add(int(m.group(1)))
+            continue
+        m = RE_OUTPUT.match(name)
+        if m:
+            output_idx.add(int(m.group(1)))
+            continue
+        m = RE_MIX.match(name)
+        if m:
+            mix_cells.add((m.group(1), int(m.group(2))))
+            continue
+        unexpected.append(name)
+    missing = fixed - seen_fixed
     if missing:
         raise Exception("Missing: %r" % (missing,))
-    expected = (
-        {C_PCM % i for i in range(1, pcms + 1)}
-        | {C_INPUT % i for i in range(1, inputs + 1)}
-        | {C_OUTPUT % i for i in range(1, outputs + 1)}
-        | {
-            C_MIX % (s, i)
-            for s in string.ascii_uppercase[:mixes]
-            for i in range(1, inputs + 1)
-        }
-        | set(FIXED)
-    )
-    unexpected = set(mixer_names) - expected
+
+    def contiguous(indices: Set[int], tpl: str) -> int:
+        if 1 not in indices:
+            raise Exception("%r not found" % (tpl % (1,),))
+        n = 1
+        while n + 1 in indices:
+            n += 1
+        return n
+
+    pcms = contiguous(pcm_idx, C_PCM)
+    inputs = contiguous(input_idx, C_INPUT)
+    outputs = contiguous(output_idx, C_OUTPUT)
+    first_row = {s for s, i in mix_cells if i == 1}
+    mixes = 0
+    while string.ascii_uppercase[mixes] in first_row:
+        mixes += 1
+    if not mixes:
+        raise Exception("%r not found" % (C_MIX % ("A", 1),))
+    mix_letters = string.ascii_uppercase[:mixes]
+    # Anything beyond the contiguous runs counts as unexpected, like the
+    # names that matched no family at all.
+    unexpected += [C_PCM % i for i in pcm_idx if i > pcms]
+    unexpected += [C_INPUT % i for i in input_idx if i > inputs]
+    unexpected += [C_OUTPUT % i for i in output_idx if i > outputs]
+    unexpected += [
+        C_MIX % (s, i)
+        for s, i in mix_cells
+        if s not in mix_letters or i > inputs
+    ]
     if unexpected:
         raise Exception("Unexpected: %r" % sorted(unexpected))
     return {
@@ -120,42 +189,67 @@ def dump_channels(channels: ScarlettChannels) -> None:
     inputs = channels["inputs"]
     outputs = channels["outputs"]
     mixes = channels["mixes"]
+    # Cached handles only pick up outside changes once their pending
+    # events are handled; refresh them so repeat dumps read current
+    # hardware state rather than values from first open.
+    for (ci, _name), m in list(_mixer_cache.items()):
+        if ci == card_index:
+            m.handleevents()
     a, b = alsaaudio.card_name(card_index)
-    print("Found hw:%s: %r %r" % (card_index, a, b))
-    print(" ".join(string.ascii_uppercase[:mixes]))
-    for i in range(1, inputs + 1):
+    # Collect everything and emit it with one write, instead of one
+    # line-buffered TTY write per print.
+    lines = ["Found hw:%s: %r %r" % (card_index, a, b)]
+    mix_letters = string.ascii_uppercase[:mixes]
+    mix_names = [
+        [C_MIX % (s, i) for s in mix_letters] for i in range(1, inputs + 1)
+    ]
+    input_enum_names = [C_INPUT % i for i in range(1, inputs + 1)]
+    lines.append(" ".join(mix_letters))
+    for row_names, input_name in zip(mix_names, input_enum_names):
         line = []
-        for s in string.ascii_uppercase[:mixes]:
-            mixer = alsaaudio.Mixer(C_MIX % (s, i), 0, card_index)
-            a, b = mixer.getrange()
-            v, = mixer.getvolume()
-            rel = int(10 * ((v - a) / (b - a + 1)))
+        for n in row_names:
+            a, b = _get_range(card_index, n)
+            v, = _get_mixer(card_index, n).getvolume()
+            # Pure integer math; a, b and v are ALSA longs and the
+            # result is 0..10, so no float round trip is needed.
+            rel = (10 * (v - a)) // (b - a + 1)
             line.append(str(rel))
-        line.append(alsaaudio.Mixer(C_INPUT % (i,), 0, card_index).getenum()[0])
-        print(" ".join(line))
+        line.append(_get_mixer(card_index, input_name).getenum()[0])
+        lines.append(" ".join(line))
     for i in range(1, pcms + 1):
         n = C_PCM % i
-        print(n, "<-", alsaaudio.Mixer(n, 0, card_index).getenum()[0])
+        lines.append("%s <- %s" % (n, _get_mixer(card_index, n).getenum()[0]))
     for i in range(1, outputs + 1):
         n = C_OUTPUT % i
-        print(n, "<-", alsaaudio.Mixer(n, 0, card_index).getenum()[0])
+        lines.append("%s <- %s" % (n, _get_mixer(card_index, n).getenum()[0]))
 
     for mixername in FIXED:
-        m = alsaaudio.Mixer(mixername, 0, card_index)
-        e = m.getenum()
-        if e:
-            print(m.mixer(), e)
-            continue
-        sc = m.switchcap()
-        if any("Playback" in s for s in sc):
-            r = m.getmute()
-            print(m.mixer(), sc, r)
-            continue
-        elif sc:
-            r = m.getrec()
-            print(m.mixer(), sc, r)
-            continue
-        print(m.mixer(), m.getrange(), m.getvolume())
+        m = _get_mixer(card_index, mixername)
+        kind = _kind_cache.get((card_index, mixername))
+        if kind is None:
+            if m.getenum():
+                kind = "enum"
+            else:
+                sc = m.switchcap()
+                if any("Playback" in s for s in sc):
+                    kind = "mute"
+                elif sc:
+                    kind = "rec"
+                else:
+                    kind = "volume"
+            _kind_cache[card_index, mixername] = kind
+        if kind == "enum":
+            lines.append("%s %s" % (m.mixer(), m.getenum()))
+        elif kind == "mute":
+            lines.append("%s %s %s" % (m.mixer(), m.switchcap(), m.getmute()))
+        elif kind == "rec":
+            lines.append("%s %s %s" % (m.mixer(), m.switchcap(), m.getrec()))
+        else:
+            lines.append(
+                "%s %s %s"
+                % (m.mixer(), _get_range(card_index, mixername), m.getvolume())
+            )
+    sys.stdout.write("\n".join(lines) + "\n")
     return card_index
 
 
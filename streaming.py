@@ -1,11 +1,12 @@
 from typing import Dict
 
 from portman.jack import PortManJack as PortMan
-from portman.base import (
-    ConnectionTrackProtocol,
-    MultiConnectionTrack,
+from portman.base import ConnectionTrackProtocol
+from portman.scarlett import (
+    Scarlett,
+    build_scarlett_preset,
+    require_scarlett_client,
 )
-from portman.scarlett import Scarlett
 from portman.tui import tuiwrapper, TuiConf
 
 
@@ -18,50 +19,48 @@ def main(pm: PortMan) -> TuiConf:
     # pm.print_all_ports()
     # pm.print_all_connections()
 
-    brand_name = "Scarlett"
-    device_name = f"{brand_name} 4i4"
-    client_name = f"{device_name} USB Pro"
-    assert client_name in pm.clients, client_name
+    client_name = require_scarlett_client(pm)
     blue = "Blue Microphones Pro"
     # assert blue in pm.clients, blue
 
     pm.set_default_sink(client_name)
     scarlett = Scarlett()
-    MultiConnectionTrack(
+    build_scarlett_preset(
+        scarlett,
         # PCM outputs:
-        scarlett.set_pcm_outputs(
+        pcm_outputs=[
             "Mix C",
             "Mix D",
             "Analogue 3",
             "Analogue 4",
             None,
             None,
-        ),
+        ],
         # Analogue outputs:
-        scarlett.set_analogue_outputs(
+        analogue_outputs=[
             # Analogue output 0+1 = speaker
             # Analogue output 2+3 = headphones
             "Mix A",
             "Mix B",
             "Mix C",
             "Mix D",
-        ),
-        scarlett.set_mix(
-            # Mixer Inputs:
-            [
-                # PCM1+2 = Playback from host
-                "PCM 1",
-                "PCM 2",
-                # Analogue 3+4 = Piano input
-                "Analogue 3",
-                "Analogue 4",
-                # Analogue 1+2 = Orchestra monitor
-                None,  # "Analogue 1",
-                None,  # "Analogue 2",
-                # PCM3+4 = Mic input
-                "PCM 3",
-                "PCM 4",
-            ],
+        ],
+        # Mixer Inputs:
+        mixer_inputs=[
+            # PCM1+2 = Playback from host
+            "PCM 1",
+            "PCM 2",
+            # Analogue 3+4 = Piano input
+            "Analogue 3",
+            "Analogue 4",
+            # Analogue 1+2 = Orchestra monitor
+            None,  # "Analogue 1",
+            None,  # "Analogue 2",
+            # PCM3+4 = Mic input
+            "PCM 3",
+            "PCM 4",
+        ],
+        mix_rows=[
             [100, 0, 100, 0, 0, 0],
             [0, 100, 0, 100, 0, 0],
             [100, 0, 100, 0, 0, 0],
@@ -70,7 +69,7 @@ def main(pm: PortMan) -> TuiConf:
             [0, 0, 0, 0, 0, 0],
             [80, 0, 80, 0, 0, 0],
             [0, 80, 0, 80, 0, 0],
-        ),
+        ],
     ).set(True)
 
     headphones_monitor = pm.stereo_out_ref(client_name, "01")
@@ -1,48 +1,46 @@
 from typing import Dict
 
 from portman.jack import PortManJack as PortMan
-from portman.base import (
-    ConnectionTrackProtocol,
-    MultiConnectionTrack,
-)
-from portman.scarlett import Scarlett
+from portman.base import ConnectionTrackProtocol
+from portman.scarlett import Scarlett, build_scarlett_preset
 from portman.tui import tuiwrapper, TuiConf
 
 
 @tuiwrapper
 def main(pm: PortMan) -> TuiConf:
     scarlett = Scarlett()
-    MultiConnectionTrack(
+    build_scarlett_preset(
+        scarlett,
         # PCM outputs:
-        scarlett.set_pcm_outputs(
+        pcm_outputs=[
             "Analogue 1",
             "Analogue 2",
             "Analogue 3",
             "Analogue 4",
             "Mix A",
             "Mix B",
-        ),
+        ],
         # Analogue outputs:
-        scarlett.set_analogue_outputs(
+        analogue_outputs=[
             # Analogue output 0+1 = speaker
             # Analogue output 2+3 = headphones
             "Mix A",
             "Mix B",
             "Mix C",
             "Mix D",
-        ),
-        scarlett.set_mix(
-            # Mixer Inputs:
-            [
-                "Analogue 1",
-                "Analogue 2",
-                "Analogue 3",
-                "Analogue 4",
-                "PCM 1",
-                "PCM 2",
-                "PCM 3",
-                "PCM 4",
-            ],
+        ],
+        # Mixer Inputs:
+        mixer_inputs=[
+            "Analogue 1",
+            "Analogue 2",
+            "Analogue 3",
+            "Analogue 4",
+            "PCM 1",
+            "PCM 2",
+            "PCM 3",
+            "PCM 4",
+        ],
+        mix_rows=[
             [100, 0, 100, 0, 0, 0],
             [0, 100, 0, 100, 0, 0],
             [100, 0, 100, 0, 0, 0],
@@ -51,7 +49,7 @@ def main(pm: PortMan) -> TuiConf:
             [0, 100, 0, 100, 0, 0],
             [100, 0, 100, 0, 0, 0],
             [0, 100, 0, 100, 0, 0],
-        ),
+        ],
     ).set(True)
 
     def conf() -> Dict[str, ConnectionTrackProtocol]: